@@ -1,14 +1,161 @@
 #EXTRATING USING BERT 
-import PyPDF2
-import pdfplumber
 import pytesseract
-from pdf2image import convert_from_path
-import re
-from typing import Dict, Tuple, Optional
+import fitz
+from PIL import Image
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional
 import warnings
 
+try:
+    from tesserocr import PyTessBaseAPI  # In-process Tesseract, no subprocess per page
+except ImportError:
+    PyTessBaseAPI = None
+
+# Cleared for the rest of the process if tesserocr can't start its engine
+_use_tesserocr = PyTessBaseAPI is not None
+
+try:
+    import regex as re  # Faster drop-in replacement when installed
+except ImportError:
+    import re
+
 warnings.filterwarnings('ignore')
 
+# Compiled once at import instead of on every call / every line
+_PATTERNS = {
+    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    'phone': r'\b(?:\+91[\s-]?)?[6-9]\d{9}\b',
+    'aadhaar': r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}\b',
+    'pan': r'\b[A-Z]{5}\d{4}[A-Z]\b',
+    'pincode': r'\b\d{6}\b',
+    'date': r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
+}
+# All fields in one alternation so the text is scanned once; m.lastgroup names the field
+_FIELDS_RE = re.compile(
+    '|'.join(f'(?P<{key}>{pattern})' for key, pattern in _PATTERNS.items()),
+    re.IGNORECASE
+)
+# Per-field patterns, for fields the combined pass missed because another field's
+# match consumed their text (e.g. a phone number used as an email's local part)
+_FIELD_PATTERNS = {key: re.compile(pattern, re.IGNORECASE) for key, pattern in _PATTERNS.items()}
+_WHITESPACE = re.compile(r'\s+')
+_NON_NAME_CHARS = re.compile(r'[^A-Za-z\s\.]')
+
+# Boilerplate words on ID cards that never appear in a person's name
+_SKIP_WORDS = {
+    'government', 'india', 'aadhaar', 'unique', 'authority',
+    'male', 'female', 'dob', 'birth', 'year', 'card', 'number',
+    'address', 'pin', 'code', 'state', 'district', 'post',
+    'income', 'tax', 'department', 'permanent', 'account',
+    'republic', 'signature', 'photo', 'date', 'issue', 'issued',
+    'enrollment', 'help', 'resident', 'identity', 'www', 'uidai'
+}
+# Single alternation so each line is scanned once instead of once per word
+_SKIP_WORDS_RE = re.compile('|'.join(map(re.escape, sorted(_SKIP_WORDS))), re.IGNORECASE)
+
+# BERT answers keyed by (question, context digest), shared across extractor instances
+_QA_CACHE: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+_QA_CACHE_SIZE = 256
+
+_EXTRACT_CACHE_DIR = Path("outputs") / ".extract_cache"
+# Part of every cache key; bump when extraction logic changes so old results are ignored
+_EXTRACT_CACHE_VERSION = 1
+# Entries hold personal data, so they expire and the cache is bounded;
+# EXTRACT_CACHE_TTL=0 turns the cache off
+_EXTRACT_CACHE_TTL = int(os.getenv("EXTRACT_CACHE_TTL", 3600))  # seconds
+_EXTRACT_CACHE_MAX_ENTRIES = 32
+
+_QA_MODEL = "distilbert-base-cased-distilled-squad"
+_ONNX_MODEL_DIR = Path("models") / "distilbert-squad-int8"
+
+_NAME_QUESTION = "What is the person's full name?"
+_ADDRESS_QUESTION = "What is the complete address?"
+
+
+def _inference_mode():
+    """torch.inference_mode() when torch is installed (no autograd state is kept)"""
+    try:
+        import torch
+        return torch.inference_mode()
+    except ImportError:
+        return nullcontext()
+
+
+def _cuda_available() -> bool:
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+
+def _prune_extract_cache():
+    """Delete expired cache entries and the oldest ones beyond the size limit"""
+    entries = []
+    for path in _EXTRACT_CACHE_DIR.glob("*.json"):
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            pass  # Pruned concurrently by another worker
+    entries.sort(reverse=True)
+    
+    now = time.time()
+    for index, (mtime, path) in enumerate(entries):
+        if index >= _EXTRACT_CACHE_MAX_ENTRIES or now - mtime > _EXTRACT_CACHE_TTL:
+            path.unlink(missing_ok=True)
+
+
+def _unique_pages(texts: List[str]) -> List[str]:
+    """Drop pages whose text repeats an earlier one, ignoring whitespace differences"""
+    seen = set()
+    unique = []
+    for text in texts:
+        key = hash(_WHITESPACE.sub('', text))
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(text)
+    return unique
+
+
+def _looks_like_name(line: str) -> bool:
+    """Cheap per-line filter for name candidates, cheapest checks first"""
+    if len(line) < 3 or len(line) > 100:
+        return False
+    
+    # Only letters, spaces and dots (also rejects any digits)
+    if _NON_NAME_CHARS.search(line):
+        return False
+    
+    # Skip lines with skip words
+    if _SKIP_WORDS_RE.search(line):
+        return False
+    
+    words = line.split()
+    
+    # Look for 2-4 word names
+    if not 2 <= len(words) <= 4:
+        return False
+    
+    # All words should be alphabetic; with only letters, spaces and dots left,
+    # a word can only fail by being nothing but dots, so dot-free lines skip the scan
+    if '.' in line and not all(w.strip('.') for w in words):
+        return False
+    
+    # First letter should be capital, filter out very short names
+    return words[0][0].isupper() and len(line.replace(' ', '')) >= 4
+
+
 class SmartPDFExtractor:
     
     def __init__(self, pdf_path: str):
@@ -16,102 +163,262 @@ class SmartPDFExtractor:
         self.text = ""
         self.data: Dict[str, str] = {}
         self.qa_pipeline = None
+        self._bert_failed = False  # Don't retry a model that already failed to load
+        self._context_digest: Optional[str] = None
+        self._lines: Optional[List[str]] = None
     
     def _init_bert(self):
         """Lazy initialization of BERT Q&A model"""
-        if self.qa_pipeline is None:
+        if self.qa_pipeline is not None or self._bert_failed:
+            return
+        
+        # CPU: INT8 ONNX Runtime first; GPU: PyTorch in half precision first
+        loaders = [("ONNX Runtime, INT8", self._load_onnx_pipeline), ("PyTorch", self._load_torch_pipeline)]
+        if _cuda_available():
+            loaders.reverse()
+        
+        for label, loader in loaders:
             try:
-                from transformers import pipeline
-                print("Loading BERT model...")
-                self.qa_pipeline = pipeline(
-                    "question-answering",
-                    model="deepset/bert-base-cased-squad2",
-                    tokenizer="deepset/bert-base-cased-squad2"
-                )
-                print("BERT model loaded")
+                print(f"Loading DistilBERT model ({label})...")
+                self.qa_pipeline = loader()
+                print("DistilBERT model loaded")
+                return
             except Exception as e:
-                print(f"Warning: BERT not available - {e}")
-                self.qa_pipeline = None
+                print(f"Warning: BERT ({label}) not available - {e}")
+        
+        self.qa_pipeline = None
+        self._bert_failed = True
     
-    def extract_text(self) -> str:
-        """Extract text using multiple methods"""
-        texts = []
+    def _load_torch_pipeline(self):
+        """Transformers Q&A pipeline, on the GPU in float16 when one is available"""
+        import torch
+        from transformers import pipeline
+        
+        # Half precision on GPU halves activation bandwidth and uses tensor cores
+        gpu_kwargs = {}
+        if torch.cuda.is_available():
+            gpu_kwargs = {"device": 0, "torch_dtype": torch.float16}
+        return pipeline(
+            "question-answering",
+            model=_QA_MODEL,
+            tokenizer=_QA_MODEL,
+            batch_size=2,
+            **gpu_kwargs
+        )
+    
+    def _load_onnx_pipeline(self):
+        """Build a Q&A pipeline on a dynamically INT8-quantized ONNX export, quantizing once on first use"""
+        from optimum.onnxruntime import ORTModelForQuestionAnswering, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from optimum.pipelines import pipeline
+        from transformers import AutoTokenizer
         
-        # Method 1: PyPDF2
+        if not (_ONNX_MODEL_DIR / "model_quantized.onnx").exists():
+            print("Exporting and quantizing model (first run only)...")
+            # Build in a private directory and rename it into place, so concurrent
+            # extraction workers never export over each other or load a half-written model
+            _ONNX_MODEL_DIR.parent.mkdir(parents=True, exist_ok=True)
+            build_dir = Path(tempfile.mkdtemp(prefix=".onnx-build-", dir=_ONNX_MODEL_DIR.parent))
+            try:
+                model = ORTModelForQuestionAnswering.from_pretrained(
+                    _QA_MODEL, export=True, provider="CPUExecutionProvider"
+                )
+                quantizer = ORTQuantizer.from_pretrained(model)
+                qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+                quantizer.quantize(save_dir=build_dir, quantization_config=qconfig)
+                AutoTokenizer.from_pretrained(_QA_MODEL).save_pretrained(build_dir)
+                try:
+                    os.replace(build_dir, _ONNX_MODEL_DIR)
+                except OSError:
+                    # Another worker finished first; use its copy
+                    if not (_ONNX_MODEL_DIR / "model_quantized.onnx").exists():
+                        raise
+            finally:
+                shutil.rmtree(build_dir, ignore_errors=True)
+        
+        model = ORTModelForQuestionAnswering.from_pretrained(
+            _ONNX_MODEL_DIR, file_name="model_quantized.onnx", provider="CPUExecutionProvider"
+        )
+        tokenizer = AutoTokenizer.from_pretrained(_ONNX_MODEL_DIR)
+        return pipeline(
+            "question-answering",
+            model=model,
+            tokenizer=tokenizer,
+            accelerator="ort",
+            batch_size=2
+        )
+    
+    def _ask_bert_batch(self, questions: List[str]) -> List[Optional[dict]]:
+        """Answer several questions over the document in one pipeline call, memoized by question and context"""
+        context = self.text[:2000]
+        if self._context_digest is None:
+            self._context_digest = hashlib.blake2b(context.encode(), digest_size=16).hexdigest()
+        keys = [(q, self._context_digest) for q in questions]
+        
+        misses = [key for key in keys if key not in _QA_CACHE]
+        if misses:
+            self._init_bert()
+            if self.qa_pipeline:
+                with _inference_mode():
+                    results = self.qa_pipeline([{"question": q, "context": context} for q, _ in misses])
+                # A single input comes back as a bare dict
+                if isinstance(results, dict):
+                    results = [results]
+                for key, result in zip(misses, results):
+                    _QA_CACHE[key] = result
+                while len(_QA_CACHE) > _QA_CACHE_SIZE:
+                    _QA_CACHE.popitem(last=False)
+        
+        for key in keys:
+            if key in _QA_CACHE:
+                _QA_CACHE.move_to_end(key)
+        return [_QA_CACHE.get(key) for key in keys]
+    
+    def _bert_answer(self, question: str, min_score: float, label: str) -> Optional[str]:
+        """BERT fallback for a single field, None when unavailable or not confident"""
+        if len(self.text) <= 50:
+            return None
         try:
-            print("Trying PyPDF2 extraction...")
-            with open(self.pdf_path, 'rb') as f:
-                pdf = PyPDF2.PdfReader(f)
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text and len(text.strip()) > 50:
-                        texts.append(text)
-            if texts:
-                print(f"✓ PyPDF2 extracted {sum(len(t) for t in texts)} characters")
+            result = self._ask_bert_batch([question])[0]
+            if result and result['score'] > min_score:
+                return result['answer'].strip()
         except Exception as e:
-            print(f"PyPDF2 failed: {e}")
+            print(f"BERT {label} extraction failed: {e}")
+        return None
+    
+    def _extract_with_pymupdf(self) -> List[str]:
+        """Extract the embedded text layer of every page in a single PyMuPDF pass"""
+        texts = []
         
-        # Method 2: PDFPlumber
         try:
-            print("Trying PDFPlumber extraction...")
-            with pdfplumber.open(self.pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
+            print("Trying PyMuPDF extraction...")
+            with fitz.open(self.pdf_path) as doc:
+                for page in doc:
+                    text = page.get_text("text")
                     if text and len(text.strip()) > 50:
                         texts.append(text)
             if texts:
-                print(f"✓ PDFPlumber extracted {sum(len(t) for t in texts)} characters")
+                print(f"✓ PyMuPDF extracted {sum(len(t) for t in texts)} characters")
         except Exception as e:
-            print(f"PDFPlumber failed: {e}")
+            print(f"PyMuPDF failed: {e}")
         
-        # Method 3: OCR if needed
+        return texts
+    
+    def _ocr_pages(self) -> List[str]:
+        """OCR the first pages in parallel, overlapping recognition with rasterization"""
+        texts = []
+        
+        # tesserocr keeps one in-process engine (and its language model) per worker thread
+        local = threading.local()
+        apis = []
+        
+        def ocr(img) -> str:
+            global _use_tesserocr
+            api = getattr(local, 'api', None)
+            if api is None and _use_tesserocr:
+                try:
+                    api = local.api = PyTessBaseAPI(lang='eng')
+                    apis.append(api)
+                except Exception as e:
+                    # Typically tessdata not found; the tesseract binary may still work
+                    print(f"tesserocr unavailable, using pytesseract - {e}")
+                    _use_tesserocr = False
+            if api is None:
+                return pytesseract.image_to_string(img, lang='eng')
+            api.SetImage(img)
+            return api.GetUTF8Text()
+        
+        try:
+            with fitz.open(self.pdf_path) as doc:
+                page_count = min(3, doc.page_count)
+                # Tesseract runs out of process or with the GIL released, so threads scale across cores
+                with ThreadPoolExecutor(max_workers=max(1, page_count)) as pool:
+                    futures = []
+                    for page in doc.pages(0, page_count):
+                        pix = page.get_pixmap(dpi=300)
+                        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+                        futures.append(pool.submit(ocr, img))
+                    
+                    for future in futures:
+                        text = future.result()
+                        if text and len(text.strip()) > 50:
+                            texts.append(text)
+        finally:
+            for api in apis:
+                api.End()
+        
+        return texts
+    
+    def extract_text(self) -> str:
+        """Extract text layer, falling back to OCR for scanned documents"""
+        # Method 1: PyMuPDF text layer
+        texts = self._extract_with_pymupdf()
+        
+        # Method 2: OCR if needed
         if not texts or sum(len(t) for t in texts) < 200:
             try:
                 print("Trying OCR extraction...")
-                images = convert_from_path(self.pdf_path, dpi=300, first_page=1, last_page=3)
-                for img in images:
-                    text = pytesseract.image_to_string(img, lang='eng')
-                    if text and len(text.strip()) > 50:
-                        texts.append(text)
+                texts.extend(self._ocr_pages())
                 if texts:
                     print(f"✓ OCR extracted {sum(len(t) for t in texts)} characters")
             except Exception as e:
                 print(f"OCR failed: {e}")
         
-        self.text = "\n\n".join(texts)
+        self.text = "\n\n".join(_unique_pages(texts))
+        self._context_digest = None
+        self._lines = None
         print(f"Total extracted: {len(self.text)} characters")
         
         return self.text
     
+    def _get_lines(self) -> List[str]:
+        """Split the text into lines once and share them between the field extractors"""
+        if self._lines is None:
+            self._lines = self.text.split('\n')
+        return self._lines
+    
     def extract_structured_data(self) -> Dict[str, str]:
         """Extract structured data using regex patterns"""
         text = self.text
         
-        patterns = {
-            'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            'phone': r'\b(?:\+91[\s-]?)?[6-9]\d{9}\b',
-            'aadhaar': r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}\b',
-            'pan': r'\b[A-Z]{5}\d{4}[A-Z]\b',
-            'pincode': r'\b\d{6}\b',
-            'date': r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
-        }
-        
         print("\nExtracting structured data...")
         
-        for key, pattern in patterns.items():
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                self.data[key] = matches[0].strip()
+        # Single pass over the text, keeping the first match of each field
+        found: Dict[str, str] = {}
+        for match in _FIELDS_RE.finditer(text):
+            found.setdefault(match.lastgroup, match.group(0).strip())
+            if len(found) == len(_PATTERNS):
+                break
+        
+        for key, pattern in _FIELD_PATTERNS.items():
+            if key not in found:
+                match = pattern.search(text)
+                if match:
+                    found[key] = match.group(0).strip()
+        
+        for key in _PATTERNS:
+            if key in found:
+                self.data[key] = found[key]
                 print(f"Found {key}: {self.data[key]}")
         
+        # Line heuristics first; whatever they miss is answered by one batched BERT call
+        name = self._name_from_lines()
+        address = self._address_from_lines()
+        pending = [q for q, answer in ((_NAME_QUESTION, name), (_ADDRESS_QUESTION, address)) if not answer]
+        if pending and len(self.text) > 50:
+            try:
+                self._ask_bert_batch(pending)
+            except Exception as e:
+                print(f"BERT batch extraction failed: {e}")
+        
         # Extract NAME with improved logic
-        name = self.extract_name_improved()
+        name = name or self._bert_answer(_NAME_QUESTION, 0.3, "name")
         if name:
             self.data['name'] = name
             print(f"Found name: {name}")
         
         # Extract ADDRESS
-        address = self.extract_address()
+        address = address or self._bert_answer(_ADDRESS_QUESTION, 0.2, "address")
         if address:
             self.data['address'] = address
             print(f"Found address: {address}")
@@ -122,48 +429,18 @@ class SmartPDFExtractor:
         """Improved name extraction with multiple strategies"""
         
         # Strategy 1: Look for name patterns in Aadhaar cards
-        lines = self.text.split('\n')
-        
-        skip_words = {
-            'government', 'india', 'aadhaar', 'unique', 'authority',
-            'male', 'female', 'dob', 'birth', 'year', 'card', 'number',
-            'address', 'pin', 'code', 'state', 'district', 'post',
-            'income', 'tax', 'department', 'permanent', 'account',
-            'republic', 'signature', 'photo', 'date', 'issue', 'issued',
-            'enrollment', 'help', 'resident', 'identity', 'www', 'uidai'
-        }
+        name = self._name_from_lines()
+        if name:
+            return name
         
-        potential_names = []
+        # Strategy 2: Use BERT if available
+        return self._bert_answer(_NAME_QUESTION, 0.3, "name")
+    
+    def _name_from_lines(self) -> Optional[str]:
+        """Pick the most complete name-looking line"""
+        lines = self._get_lines()
         
-        for line in lines:
-            line = line.strip()
-            
-            if len(line) < 3 or len(line) > 100:
-                continue
-            
-            # Skip lines with skip words
-            if any(skip in line.lower() for skip in skip_words):
-                continue
-            
-            # Skip lines with numbers
-            if re.search(r'\d{2,}', line):
-                continue
-            
-            # Skip lines with special characters (except spaces and dots)
-            if re.search(r'[^A-Za-z\s\.]', line):
-                continue
-            
-            words = line.split()
-            
-            # Look for 2-4 word names
-            if 2 <= len(words) <= 4:
-                # All words should be alphabetic
-                if all(w.replace('.', '').isalpha() for w in words):
-                    # First letter should be capital
-                    if words[0][0].isupper():
-                        # Filter out very short names
-                        if len(line.replace(' ', '')) >= 4:
-                            potential_names.append(line)
+        potential_names = [line for line in map(str.strip, lines) if _looks_like_name(line)]
         
         # Return the longest name (usually most complete)
         if potential_names:
@@ -178,29 +455,24 @@ class SmartPDFExtractor:
             
             return best_name
         
-        # Strategy 2: Use BERT if available
-        self._init_bert()
-        if self.qa_pipeline and len(self.text) > 50:
-            try:
-                result = self.qa_pipeline(
-                    question="What is the person's full name?",
-                    context=self.text[:2000]
-                )
-                if result['score'] > 0.3:
-                    return result['answer'].strip()
-            except Exception as e:
-                print(f"BERT name extraction failed: {e}")
-        
         return None
     
     def extract_address(self) -> Optional[str]:
         """Extract address from document"""
         
         # Try to find address patterns
-        lines = self.text.split('\n')
+        address = self._address_from_lines()
+        if address:
+            return address
+        
+        # Use BERT as fallback
+        return self._bert_answer(_ADDRESS_QUESTION, 0.2, "address")
+    
+    def _address_from_lines(self) -> Optional[str]:
+        """Take the block of lines following an address indicator"""
+        lines = self._get_lines()
         
         # Look for lines that look like addresses
-        address_lines = []
         for i, line in enumerate(lines):
             line = line.strip()
             
@@ -217,29 +489,59 @@ class SmartPDFExtractor:
                 if len(address) > 20:
                     return address[:200]  # Limit length
         
-        # Use BERT as fallback
-        self._init_bert()
-        if self.qa_pipeline and len(self.text) > 50:
-            try:
-                result = self.qa_pipeline(
-                    question="What is the complete address?",
-                    context=self.text[:2000]
-                )
-                if result['score'] > 0.2:
-                    return result['answer'].strip()
-            except Exception as e:
-                print(f"BERT address extraction failed: {e}")
-        
         return None
     
+    def _file_digest(self) -> str:
+        """Content hash of the PDF, read in chunks"""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(self.pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _load_cached(self, cache_path: Path) -> bool:
+        """Restore text and data from a previous run on the same PDF bytes"""
+        if _EXTRACT_CACHE_TTL <= 0 or not cache_path.exists():
+            return False
+        try:
+            if time.time() - cache_path.stat().st_mtime > _EXTRACT_CACHE_TTL:
+                cache_path.unlink()
+                return False
+            cached = json.loads(cache_path.read_text(encoding='utf-8'))
+            self.text, self.data = cached['text'], cached['data']
+            return True
+        except Exception as e:
+            print(f"Ignoring unreadable extraction cache: {e}")
+            return False
+    
+    def _save_cached(self, cache_path: Path):
+        """Store text and data so a re-upload of the same PDF skips extraction"""
+        try:
+            _EXTRACT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(
+                json.dumps({'text': self.text, 'data': self.data}),
+                encoding='utf-8'
+            )
+            _prune_extract_cache()
+        except Exception as e:
+            print(f"Warning: could not write extraction cache - {e}")
+    
     def process(self) -> Tuple[str, Dict[str, str]]:
         """Complete extraction pipeline"""
         print("\n" + "="*60)
         print("EXTRACTING DATA FROM PDF")
         print("="*60)
         
-        self.extract_text()
-        self.extract_structured_data()
+        # Extraction is deterministic in the PDF bytes, so reuse earlier results
+        cache_path = _EXTRACT_CACHE_DIR / f"v{_EXTRACT_CACHE_VERSION}-{self._file_digest()}.json"
+        if self._load_cached(cache_path):
+            print("✓ Loaded from extraction cache")
+        else:
+            self.extract_text()
+            self.extract_structured_data()
+            # An empty or partial result may come from a broken OCR/BERT setup; don't pin it
+            if _EXTRACT_CACHE_TTL > 0 and self.text and self.data and not self._bert_failed:
+                self._save_cached(cache_path)
         
         print("\n" + "="*60)
         print(f"EXTRACTION COMPLETE - Found {len(self.data)} fields")
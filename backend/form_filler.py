@@ -4,20 +4,117 @@ Google Form Filler Module
 Automatically fills Google Forms using Playwright
 """
 
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from typing import Dict, Tuple, Optional
 import asyncio
 from pathlib import Path
+import re
 import traceback
+from urllib.parse import urlparse
+
+
+# (data key, question keywords) in priority order - first group with a hit wins
+_FIELD_KEYWORDS = [
+    ('name', ['name', 'naam', 'full name', 'your name', 'applicant name']),
+    ('email', ['email', 'e-mail', 'mail', 'electronic']),
+    ('phone', ['phone', 'mobile', 'contact', 'telephone', 'cell']),
+    ('aadhaar', ['aadhaar', 'aadhar', 'uid', 'unique id']),
+    ('pan', ['pan', 'permanent account']),
+    ('address', ['address', 'location', 'residence', 'residential']),
+    ('pincode', ['pin', 'postal', 'zip', 'pincode']),
+    ('date', ['dob', 'birth', 'date of birth']),
+]
+
+# One lookahead per group tried in order, so a single match() keeps the priority
+# above; the empty named group tells which data key matched
+_FIELD_RE = re.compile(
+    '|'.join(
+        f"(?=.*?(?:{'|'.join(map(re.escape, keywords))}))(?P<{key}>)"
+        for key, keywords in _FIELD_KEYWORDS
+    ),
+    re.DOTALL
+)
+
+# innerText of each question's heading ('' when it has none)
+_QUESTION_HEADINGS_JS = """() => Array.from(
+    document.querySelectorAll('[role="listitem"]'),
+    el => el.querySelector('[role="heading"]')?.innerText || ''
+)"""
+
+
+# Requests the filler never needs; CSS and JS stay since the form depends on them
+_BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media'}
+_BLOCKED_HOSTS = {'www.google-analytics.com', 'www.googletagmanager.com', 'ssl.google-analytics.com'}
+
+
+def _is_blocked(request) -> bool:
+    return (request.resource_type in _BLOCKED_RESOURCE_TYPES
+            or urlparse(request.url).hostname in _BLOCKED_HOSTS)
+
+
+async def _route_request(route):
+    if _is_blocked(route.request):
+        await route.abort()
+    else:
+        await route.continue_()
 
 
 class GoogleFormFiller:
     """Intelligent Google Forms filler with retry logic"""
     
+    # Shared across instances and calls so Chromium only cold-starts once;
+    # tied to the event loop that launched it (_loop)
+    _pw = None
+    _browser = None
+    _browser_lock: Optional[asyncio.Lock] = None
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    
     def __init__(self):
         self.output_dir = Path("outputs")
         self.output_dir.mkdir(exist_ok=True)
     
+    async def _get_browser(self):
+        """Return the shared browser, launching it on first use or after it died"""
+        cls = GoogleFormFiller
+        loop = asyncio.get_running_loop()
+        if cls._loop is not loop:
+            # A new loop (e.g. a second asyncio.run()); the old driver connection
+            # ran on the previous loop and can't be used, or even closed, from here
+            cls._pw = None
+            cls._browser = None
+            cls._browser_lock = asyncio.Lock()
+            cls._loop = loop
+        
+        async with cls._browser_lock:
+            if cls._browser is None or not cls._browser.is_connected():
+                if cls._pw is None:
+                    cls._pw = await async_playwright().start()
+                
+                print("Launching browser...")
+                cls._browser = await cls._pw.chromium.launch(
+                    headless=True,  # Set to False to see browser
+                    args=[
+                        '--disable-blink-features=AutomationControlled',
+                        '--disable-dev-shm-usage',
+                        '--no-sandbox'
+                    ]
+                )
+                print("✓ Browser launched")
+        
+        return cls._browser
+    
+    async def close(self):
+        """Shut down the shared browser and Playwright driver"""
+        cls = GoogleFormFiller
+        if cls._loop is not asyncio.get_running_loop():
+            return  # Launched on another loop; nothing usable to close from here
+        if cls._browser is not None:
+            await cls._browser.close()
+            cls._browser = None
+        if cls._pw is not None:
+            await cls._pw.stop()
+            cls._pw = None
+    
     async def fill_form(
         self, 
         url: str, 
@@ -37,102 +134,97 @@ class GoogleFormFiller:
         print("="*60)
         
         try:
-            async with async_playwright() as p:
-                # Launch browser
-                print("Launching browser...")
-                browser = await p.chromium.launch(
-                    headless=True,  # Set to False to see browser
-                    args=[
-                        '--disable-blink-features=AutomationControlled',
-                        '--disable-dev-shm-usage',
-                        '--no-sandbox'
-                    ]
-                )
-                print("✓ Browser launched")
+            browser = await self._get_browser()
+            
+            # Fresh context per form so cookies/state never leak between fills
+            context = await browser.new_context(
+                viewport={'width': 1280, 'height': 1024},
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            )
+            await context.route("**/*", _route_request)
+            
+            page = await context.new_page()
+            print("✓ Page created")
+            
+            try:
+                # Load page
+                print(f"Loading page: {url}")
+                # The form is usable once its questions render; don't wait on analytics beacons
+                await page.goto(url, wait_until='domcontentloaded', timeout=20000)
+                await page.wait_for_selector('[role="listitem"]', timeout=15000)
+                print("✓ Page loaded\n")
                 
-                # Create context
-                context = await browser.new_context(
-                    viewport={'width': 1280, 'height': 1024},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                )
+                filled = 0
+                total = 0
                 
-                page = await context.new_page()
-                print("✓ Page created")
+                # Get all form questions
+                print("Looking for form questions...")
+                questions = await page.query_selector_all('[role="listitem"]')
+                print(f"Found {len(questions)} potential form questions\n")
                 
-                try:
-                    # Load page
-                    print(f"Loading page: {url}")
-                    await page.goto(url, wait_until='networkidle', timeout=60000)
-                    await page.wait_for_timeout(3000)
-                    print("✓ Page loaded\n")
-                    
-                    filled = 0
-                    total = 0
-                    
-                    # Get all form questions
-                    print("Looking for form questions...")
-                    questions = await page.query_selector_all('[role="listitem"]')
-                    print(f"Found {len(questions)} potential form questions\n")
-                    
-                    for idx, q in enumerate(questions, 1):
-                        try:
-                            # Get question text
-                            heading = await q.query_selector('[role="heading"]')
-                            if not heading:
-                                continue
-                            
-                            q_text = (await heading.inner_text()).strip()
-                            q_text = q_text.replace('*', '').strip().lower()
-                            
-                            if not q_text or len(q_text) < 2:
-                                continue
-                            
-                            total += 1
-                            print(f"[{idx}] Question: {q_text[:60]}...")
-                            
-                            # Get value for this field
-                            value = self.get_value_for_field(q_text, data_dict)
-                            
-                            if not value:
-                                print(f"    ✗ No matching data found\n")
-                                continue
-                            
-                            # Try to fill the field
-                            success = await self.fill_field(page, q, value)
-                            
-                            if success:
-                                filled += 1
-                                print(f"    ✅ Filled with: {value}\n")
-                            else:
-                                print(f"    ⚠️  Could not fill field\n")
+                # All headings in one round-trip, in the same document order as questions.
+                # Filling stays sequential: keyboard focus is shared by the whole page.
+                headings = await page.evaluate(_QUESTION_HEADINGS_JS)
+                
+                for idx, (q, heading) in enumerate(zip(questions, headings), 1):
+                    try:
+                        q_text = heading.replace('*', '').strip().lower()
                         
-                        except Exception as e:
-                            print(f"    ❌ Error processing question: {e}\n")
-                            traceback.print_exc()
+                        if not q_text or len(q_text) < 2:
                             continue
+                        
+                        total += 1
+                        print(f"[{idx}] Question: {q_text[:60]}...")
+                        
+                        # Get value for this field
+                        value = self.get_value_for_field(q_text, data_dict)
+                        
+                        if not value:
+                            print(f"    ✗ No matching data found\n")
+                            continue
+                        
+                        # Try to fill the field
+                        success = await self.fill_field(page, q, value)
+                        
+                        if success:
+                            filled += 1
+                            print(f"    ✅ Filled with: {value}\n")
+                        else:
+                            print(f"    ⚠️  Could not fill field\n")
                     
-                    print("="*60)
-                    print(f"✅ FILLED {filled}/{total} FIELDS")
-                    print("="*60 + "\n")
-                    
-                    # Capture screenshot
-                    print("Capturing screenshot...")
-                    await page.wait_for_timeout(2000)
-                    screenshot_name = 'filled_form.png'
-                    screenshot_path = self.output_dir / screenshot_name
-                    await page.screenshot(path=str(screenshot_path), full_page=True)
-                    print(f"✓ Screenshot saved: {screenshot_name}\n")
-                    
-                    await browser.close()
-                    return filled, total, screenshot_name
-                    
-                except Exception as e:
-                    print(f"\n❌ Error during form filling: {e}")
-                    print("Full traceback:")
-                    traceback.print_exc()
-                    await browser.close()
-                    raise
-                    
+                    except Exception as e:
+                        print(f"    ❌ Error processing question: {e}\n")
+                        traceback.print_exc()
+                        continue
+                
+                print("="*60)
+                print(f"✅ FILLED {filled}/{total} FIELDS")
+                print("="*60 + "\n")
+                
+                # Capture screenshot
+                print("Capturing screenshot...")
+                try:
+                    await page.wait_for_load_state('networkidle', timeout=5000)
+                except PlaywrightTimeoutError:
+                    pass  # Screenshot whatever has rendered
+                # Full page so every answer is reviewable; JPEG is far smaller and faster to encode than PNG
+                screenshot_name = 'filled_form.jpg'
+                screenshot_path = self.output_dir / screenshot_name
+                await page.screenshot(path=str(screenshot_path), full_page=True, type='jpeg', quality=80)
+                print(f"✓ Screenshot saved: {screenshot_name}\n")
+                
+                return filled, total, screenshot_name
+                
+            except Exception as e:
+                print(f"\n❌ Error during form filling: {e}")
+                print("Full traceback:")
+                traceback.print_exc()
+                raise
+            
+            finally:
+                # Only the context is disposable; the browser is reused by the next fill
+                await context.close()
+            
         except Exception as e:
             print(f"\n❌ Fatal Error in fill_form: {e}")
             print("Error type:", type(e).__name__)
@@ -159,19 +251,8 @@ class GoogleFormFiller:
                 if not is_visible:
                     continue
                 
-                # Scroll into view
-                await inp.scroll_into_view_if_needed()
-                await page.wait_for_timeout(500)
-                
-                # Focus
-                await inp.focus()
-                await page.wait_for_timeout(300)
-                
-                # Clear and fill
-                await inp.fill('')
-                await page.wait_for_timeout(200)
-                await inp.type(str(value), delay=50)
-                await page.wait_for_timeout(300)
+                # fill() scrolls, focuses, clears and sets the value in one action
+                await inp.fill(str(value))
                 
                 return True
                 
@@ -186,7 +267,6 @@ class GoogleFormFiller:
                 label_text = (await label.inner_text()).strip().lower()
                 if str(value).lower() in label_text:
                     await label.click()
-                    await page.wait_for_timeout(300)
                     return True
         except Exception as e:
             print(f"      Error with radio/checkbox: {e}")
@@ -197,7 +277,6 @@ class GoogleFormFiller:
             dropdowns = await question_element.query_selector_all('select')
             for dropdown in dropdowns:
                 await dropdown.select_option(label=str(value))
-                await page.wait_for_timeout(300)
                 return True
         except Exception as e:
             print(f"      Error with dropdown: {e}")
@@ -216,38 +295,5 @@ class GoogleFormFiller:
         Returns:
             Value to fill, or empty string if no match
         """
-        field = field_name.lower()
-        
-        # Name field
-        if any(k in field for k in ['name', 'naam', 'full name', 'your name', 'applicant name']):
-            return data.get('name', '')
-        
-        # Email field
-        elif any(k in field for k in ['email', 'e-mail', 'mail', 'electronic']):
-            return data.get('email', '')
-        
-        # Phone field
-        elif any(k in field for k in ['phone', 'mobile', 'contact', 'telephone', 'cell']):
-            return data.get('phone', '')
-        
-        # Aadhaar field
-        elif any(k in field for k in ['aadhaar', 'aadhar', 'uid', 'unique id']):
-            return data.get('aadhaar', '')
-        
-        # PAN field
-        elif any(k in field for k in ['pan', 'permanent account']):
-            return data.get('pan', '')
-        
-        # Address field
-        elif any(k in field for k in ['address', 'location', 'residence', 'residential']):
-            return data.get('address', '')
-        
-        # Pincode field
-        elif any(k in field for k in ['pin', 'postal', 'zip', 'pincode']):
-            return data.get('pincode', '')
-        
-        # Date field
-        elif any(k in field for k in ['dob', 'birth', 'date of birth']):
-            return data.get('date', '')
-        
-        return ''
\ No newline at end of file
+        match = _FIELD_RE.match(field_name.lower())
+        return data.get(match.lastgroup, '') if match else ''
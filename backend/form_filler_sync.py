@@ -1,46 +1,314 @@
 """ Form Filler Module - Keep Browser Open Version
 """
 
-from playwright.sync_api import sync_playwright, Error as PlaywrightError
+from playwright.sync_api import sync_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
 from typing import Dict, Tuple, Optional
 from pathlib import Path
-import traceback
+import re
+import logging
 import subprocess
 import sys
-import time
+import os
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+
+# Idle browsers (each with a warm context) kept between fills
+BROWSER_POOL_SIZE = 2
+
+# How often (ms) a slot waiting for its form window to close checks for shutdown
+CLOSE_WAIT_STEP_MS = 1000
+
+# Seconds a preloaded form waits to be filled before its browser is returned to the pool
+PREWARM_TTL = 300
+
+# (data key, question keywords) in priority order
+_FIELD_KEYWORDS = [
+    ('name', ['name', 'naam', 'full name', 'your name', 'applicant']),
+    ('email', ['email', 'e-mail', 'mail', 'electronic']),
+    ('phone', ['phone', 'mobile', 'contact', 'telephone', 'cell']),
+    ('aadhaar', ['aadhaar', 'aadhar', 'uid', 'unique', 'adhaar']),
+    ('pan', ['pan', 'permanent account']),
+    ('address', ['address', 'location', 'residence', 'street']),
+    ('pincode', ['pin', 'postal', 'zip', 'pincode']),
+    ('date', ['dob', 'birth', 'date']),
+]
+
+# One optional lookahead per key, all evaluated by a single match() at position 0;
+# each named group is set iff one of that key's keywords occurs in the question
+_FIELD_RE = re.compile(
+    ''.join(
+        f"(?=(?:.*?(?P<{key}>{'|'.join(map(re.escape, keywords))}))?)"
+        for key, keywords in _FIELD_KEYWORDS
+    ),
+    re.DOTALL
+)
+
+
+# Fills the first visible text field of each listed question in a single evaluation.
+# Values go through the native value setter and bubbling input/change events so the
+# form's own listeners register them. Returns one success flag per item.
+_BATCH_FILL_JS = """(items) => {
+    const questions = document.querySelectorAll('[role="listitem"]');
+    const setInput = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    const setTextArea = Object.getOwnPropertyDescriptor(HTMLTextAreaElement.prototype, 'value').set;
+    const fieldSelector = 'input[type="text"], input[type="email"], input[type="tel"], ' +
+        'input[type="number"], textarea, [contenteditable="true"]';
+    
+    return items.map(({index, value}) => {
+        const question = questions[index];
+        if (!question) return false;
+        
+        const field = Array.from(question.querySelectorAll(fieldSelector))
+            .find(el => el.getClientRects().length > 0);
+        if (!field) return false;
+        
+        if (field.isContentEditable) {
+            field.textContent = value;
+        } else if (field instanceof HTMLTextAreaElement) {
+            setTextArea.call(field, value);
+        } else {
+            setInput.call(field, value);
+        }
+        field.dispatchEvent(new Event('input', {bubbles: true}));
+        field.dispatchEvent(new Event('change', {bubbles: true}));
+        return true;
+    });
+}"""
+
+
+# Analytics the filler never needs. Only these are blocked: the window is where
+# the user reviews and submits, so question images and fonts must still load
+_BLOCKED_HOSTS = ['www.google-analytics.com', 'www.googletagmanager.com', 'ssl.google-analytics.com']
+
+
+# Reads every question's title in one round-trip, trying the same selectors
+# in order as the old per-element lookups
+_EXTRACT_QUESTIONS_JS = """() => {
+    const fallbacks = [
+        '.freebirdFormviewerComponentsQuestionBaseTitle',
+        '.freebirdFormviewerViewItemsItemItemTitle',
+        '[data-item-id] > div > div > div',
+        'div[dir="auto"]'
+    ];
+    const clean = (el) => (el && el.innerText || '').trim();
+    
+    return Array.from(document.querySelectorAll('[role="listitem"]'), (item, idx) => {
+        let text = clean(item.querySelector('[role="heading"]'));
+        for (const sel of fallbacks) {
+            if (text) break;
+            const candidate = clean(item.querySelector(sel));
+            if (candidate.length > 1) text = candidate;
+        }
+        return {
+            idx: idx,
+            text: text.replace(/\\*/g, '').trim(),
+            hasInput: !!item.querySelector('input'),
+            hasTextarea: !!item.querySelector('textarea'),
+            hasContentEditable: !!item.querySelector('[contenteditable="true"]')
+        };
+    });
+}"""
+
+
+# Text controls the per-field fallback tries, restricted to visible ones
+_TEXT_INPUT_SELECTOR = ', '.join(
+    f'{selector}:visible' for selector in (
+        'input[type="text"]',
+        'input[type="email"]',
+        'input[type="tel"]',
+        'input[type="number"]',
+        'input[aria-label]',
+        'textarea',
+    )
+)
+
+# Replaces a contenteditable's text in one step; Google Forms reacts to the input event
+_SET_TEXT_CONTENT_JS = """(element, value) => {
+    element.textContent = value;
+    element.dispatchEvent(new InputEvent('input', { bubbles: true, inputType: 'insertText', data: value }));
+}"""
+
+# Sets an input's value directly; the value is an argument, never spliced into the source
+_SET_VALUE_JS = """(element, value) => {
+    element.value = value;
+    element.dispatchEvent(new Event('input', { bubbles: true }));
+    element.dispatchEvent(new Event('change', { bubbles: true }));
+}"""
+
+# Per-field fallback ladder: (strategy id, description, controls to try inside the question)
+_FILL_STRATEGIES = [
+    (1, "Looking for input fields", _TEXT_INPUT_SELECTOR),
+    (2, "Looking for contenteditable divs", '[contenteditable="true"]:visible'),
+    (3, "Using JavaScript injection", 'input:visible, textarea:visible'),
+]
+
+# Which strategy/control worked for each question of each form, so repeat
+# fills of a form go straight to it; bump the version to discard old entries
+_SKILLS_PATH = Path("outputs") / "skills.json"
+_SKILLS_VERSION = 1
+
+
+class _BrowserSlot:
+    """
+    One Playwright driver, browser and context owned by a dedicated thread
+    
+    Sync Playwright objects may only be used from the thread that created
+    them, and only dispatch events while that thread is blocked in a
+    Playwright call. Giving each browser its own thread lets a slot block on
+    page events (e.g. the user closing the form) without stalling other fills.
+    """
+    
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playwright")
+        self._stopping = threading.Event()
+        self._pw = None
+        self.browser = None
+        self.context = None
+    
+    def call(self, fn, *args, **kwargs):
+        """Run fn on this slot's thread and return its result"""
+        return self.submit(fn, *args, **kwargs).result()
+    
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn on this slot's thread without waiting for it"""
+        return self._executor.submit(fn, *args, **kwargs)
+    
+    def open_page(self):
+        """Open a page, (re)launching the browser if needed (slot thread)"""
+        if self.browser is None or not self.browser.is_connected():
+            # The user may have closed the whole browser window; start over
+            if self._pw is None:
+                self._pw = sync_playwright().start()
+            
+            log.info("Launching browser...")
+            self.browser = self._pw.chromium.launch(
+                headless=False,  # Always visible
+                args=[
+                    '--disable-blink-features=AutomationControlled',
+                    '--disable-dev-shm-usage',
+                    '--no-sandbox'
+                ]
+            )
+            log.info("✓ Browser launched")
+            self.context = None
+        
+        if self.context is None:
+            self.context = self.browser.new_context(
+                viewport={'width': 1280, 'height': 1024},
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            )
+            for host in _BLOCKED_HOSTS:
+                self.context.route(re.compile(rf"^https?://{re.escape(host)}/"), lambda route: route.abort())
+        
+        return self.context.new_page()
+    
+    def wait_until_closed(self, page):
+        """Block until the user closes the page or the browser (slot thread)"""
+        # Waits in bounded steps so shutdown() can interrupt it; the close event
+        # still ends a step as soon as it fires
+        while not self._stopping.is_set():
+            # wait_for_event never fires for a page that is already gone
+            if page.is_closed() or not self.browser.is_connected():
+                return
+            try:
+                page.wait_for_event("close", timeout=CLOSE_WAIT_STEP_MS)
+                return
+            except PlaywrightTimeoutError:
+                continue
+            except PlaywrightError:
+                return  # Browser disconnected
+    
+    def reset(self, page=None):
+        """Close the page and clear state so the next user starts fresh (slot thread)"""
+        if page is not None and not page.is_closed():
+            page.close()
+        if self.context is not None and self.browser.is_connected():
+            self.context.clear_cookies()
+    
+    @property
+    def stopped(self) -> bool:
+        return self._stopping.is_set()
+    
+    def shutdown(self):
+        """Close the browser and stop this slot's thread (safe to call more than once)"""
+        if self._stopping.is_set():
+            return
+        # Ends any wait_until_closed() within one step so stop() gets the thread
+        self._stopping.set()
+        
+        def stop():
+            try:
+                if self.browser is not None:
+                    self.browser.close()
+                if self._pw is not None:
+                    self._pw.stop()
+            except Exception as e:
+                log.warning("Error while closing browser: %s", e)
+            self.browser = self.context = self._pw = None
+        
+        self.call(stop)
+        self._executor.shutdown(wait=False)
 
 
 class GoogleFormFiller:
     """Synchronous Google Forms filler with persistent browser"""
     
+    # Browsers shared by all instances: idle ones wait in the pool, busy ones
+    # belong to a form window the user still has open
+    _idle_slots: "queue.Queue[_BrowserSlot]" = queue.Queue()
+    _active_slots: set = set()
+    _active_lock = threading.Lock()
+    
+    # Chromium install check runs once per process, not per request
+    _BROWSER_VERIFIED = False
+    _verify_lock = threading.Lock()
+    
+    # form URL -> question text -> {strategy, selector, index}; loaded on first use
+    _skills: Optional[Dict[str, Dict[str, dict]]] = None
+    _skills_dirty = False
+    _skills_lock = threading.Lock()
+    
+    # Forms preloaded by prewarm(), keyed by URL: (slot, future resolving to the page, expiry timer)
+    _warm_pages: Dict[str, tuple] = {}
+    _warm_lock = threading.Lock()
+    
     def __init__(self):
         self.output_dir = Path("outputs")
         self.output_dir.mkdir(exist_ok=True)
         self._ensure_browser_installed()
     
     def _ensure_browser_installed(self):
-        """Check and install Playwright browsers if needed"""
-        try:
-            with sync_playwright() as p:
-                try:
-                    browser = p.chromium.launch(headless=True)
-                    browser.close()
-                    print("Chromium browser is available")
-                    return True
-                except PlaywrightError as e:
-                    if "Executable doesn't exist" in str(e):
-                        print("\nChromium browser not found. Installing...")
-                        self._install_browsers()
-                        return True
-                    raise
-        except Exception as e:
-            print(f"Warning: Could not verify browser installation: {e}")
-            return False
+        """Check (once per process) and install Playwright browsers if needed"""
+        with GoogleFormFiller._verify_lock:
+            if GoogleFormFiller._BROWSER_VERIFIED:
+                return True
+            
+            try:
+                # Only ask the driver where Chromium lives; no need to launch it
+                with sync_playwright() as p:
+                    executable = p.chromium.executable_path
+                
+                if os.path.exists(executable):
+                    log.info("Chromium browser is available")
+                else:
+                    log.info("Chromium browser not found. Installing...")
+                    self._install_browsers()
+                
+                GoogleFormFiller._BROWSER_VERIFIED = True
+                return True
+            except Exception as e:
+                log.warning("Could not verify browser installation: %s", e)
+                return False
     
     def _install_browsers(self):
         """Install Playwright browsers"""
         try:
-            print("Installing Chromium browser...")
+            log.info("Installing Chromium browser...")
             result = subprocess.run(
                 [sys.executable, "-m", "playwright", "install", "chromium"],
                 capture_output=True,
@@ -48,362 +316,452 @@ class GoogleFormFiller:
                 timeout=300
             )
             if result.returncode == 0:
-                print("Chromium browser installed successfully")
+                log.info("Chromium browser installed successfully")
             else:
                 raise Exception("Browser installation failed")
         except Exception as e:
-            print(f"Error installing browser: {e}")
-            print("\nPlease manually run: playwright install chromium")
+            log.error("Error installing browser: %s", e)
+            log.error("Please manually run: playwright install chromium")
             raise
     
-    def fill_form(
+    def fill_form_and_return(
         self, 
         url: str, 
         data_dict: Dict[str, str]
-    ) -> Tuple[int, int, Optional[str]]:
-        """Fill Google Form with extracted data and keep browser open"""
+    ) -> Tuple[int, int, Optional[str], tuple]:
+        """
+        Fill Google Form with extracted data and return without waiting
         
-        print(f"\nOpening form: {url}")
-        print("="*60)
+        The form window stays open for the user; pass the returned session
+        to window_closed() (or wait_for_close() to block) to learn when they close it.
         
-        # Convert /preview to /viewform
-        if '/preview' in url:
-            url = url.replace('/preview', '/viewform')
-            print(f"Converted to viewform URL: {url}")
+        Returns:
+            (fields_filled, total_fields, screenshot_filename, session)
+        """
+        
+        log.info("Opening form: %s", url)
+        url = self._normalize_url(url)
         
         try:
-            with sync_playwright() as p:
-                print("Launching browser...")
-                browser = p.chromium.launch(
-                    headless=False,  # Always visible
-                    slow_mo=50,
-                    args=[
-                        '--disable-blink-features=AutomationControlled',
-                        '--disable-dev-shm-usage',
-                        '--no-sandbox'
-                    ]
+            slot, page = self._claim_warm_page(url)
+            preloaded = page is not None
+            if preloaded:
+                self._track_active(slot)
+            if not preloaded:
+                slot = slot or self._acquire_slot()
+                self._track_active(slot)
+                page = slot.call(slot.open_page)
+                log.debug("Page created")
+            session = (slot, page)
+            
+            try:
+                filled, total, screenshot_name = slot.call(
+                    self._fill_page, page, url, data_dict, preloaded
                 )
-                print("✓ Browser launched")
                 
-                context = browser.new_context(
-                    viewport={'width': 1280, 'height': 1024},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+                log.info(
+                    "Browser will remain open - fill any remaining fields, review the "
+                    "data and submit the form, then close the window when done"
                 )
                 
-                page = context.new_page()
-                print("Page created")
+                return filled, total, screenshot_name, session
+                
+            except Exception as e:
+                log.error("Error during form filling: %s: %s", type(e).__name__, e)
+                log.debug("Traceback:", exc_info=True)
                 
                 try:
-                    print(f"Loading page...")
-                    page.goto(url, wait_until='domcontentloaded', timeout=60000)
-                    page.wait_for_timeout(3000)
-                    print("Page loaded\n")
-                    
-                    filled = 0
-                    total = 0
-                    
-                    # Wait for form to be fully loaded
-                    page.wait_for_selector('[role="listitem"]', timeout=10000)
-                    
-                    # Get all form questions
-                    print("Analyzing form structure...")
-                    questions = page.query_selector_all('[role="listitem"]')
-                    print(f"Found {len(questions)} form elements\n")
-                    
-                    for idx, q in enumerate(questions, 1):
-                        try:
-                            # Get question text - try multiple methods
-                            q_text = self._get_question_text(q)
-                            if not q_text:
-                                continue
-                            
-                            q_text_lower = q_text.lower()
-                            total += 1
-                            
-                            print(f"[{idx}] Question: {q_text}")
-                            
-                            # Get value for this field
-                            value = self.get_value_for_field(q_text_lower, data_dict)
-                            
-                            if not value:
-                                print(f"    No matching data (available: {list(data_dict.keys())})\n")
-                                continue
-                            
-                            print(f"    → Attempting to fill with: {value}")
-                            
-                            # Try to fill the field
-                            success = self._fill_field_advanced(page, q, value, q_text_lower)
-                            
-                            if success:
-                                filled += 1
-                                print(f"    Successfully filled!\n")
-                            else:
-                                print(f"    Could not fill field\n")
-                        
-                        except Exception as e:
-                            print(f"    Error: {e}\n")
-                            traceback.print_exc()
-                            continue
-                    
-                    print("="*60)
-                    print(f"FILLED {filled}/{total} FIELDS")
-                    print("="*60 + "\n")
-                    
-                    # Capture screenshot
-                    print("Capturing screenshot...")
-                    page.wait_for_timeout(2000)
-                    screenshot_name = 'filled_form.png'
-                    screenshot_path = self.output_dir / screenshot_name
-                    page.screenshot(path=str(screenshot_path), full_page=True)
-                    print(f"✓ Screenshot saved: {screenshot_name}\n")
-                    
-                    # *** KEY CHANGE: Keep browser open indefinitely ***
-                    print("\n" + "="*60)
-                    print(" BROWSER WILL REMAIN OPEN")
-                    print("="*60)
-                    print("\n You can now:")
-                    print("   • Fill any remaining fields manually")
-                    print("   • Review the auto-filled data")
-                    print("   • Submit the form when ready")
-                    print("   • Close the browser window when done")
-                    print("\n This terminal will wait until you close the browser...")
-                    print("="*60 + "\n")
-                    
-                    # Wait for browser to be closed by user
-                    try:
-                        # Keep checking if browser is still open
-                        while True:
-                            try:
-                                # Try to get page title - will fail if browser closed
-                                page.title()
-                                time.sleep(1)  # Check every second
-                            except:
-                                # Browser was closed
-                                break
-                    except KeyboardInterrupt:
-                        print("\n\n Interrupted by user (Ctrl+C)")
-                    
-                    print("\n Browser closed. Cleaning up...")
-                    
-                    return filled, total, screenshot_name
-                    
-                except Exception as e:
-                    print(f"\n Error during form filling: {e}")
-                    traceback.print_exc()
-                    
-                    try:
-                        page.screenshot(path=str(self.output_dir / 'error.png'))
-                    except:
-                        pass
-                    
-                    # Still keep browser open even on error
-                    print("\n Error occurred, but browser will remain open for manual filling...")
-                    try:
-                        while True:
-                            try:
-                                page.title()
-                                time.sleep(1)
-                            except:
-                                break
-                    except KeyboardInterrupt:
-                        pass
-                    
-                    browser.close()
-                    raise
+                    slot.call(page.screenshot, path=str(self.output_dir / 'error.png'))
+                except:
+                    pass
+                
+                # Still keep browser open even on error; recycle it once the user is done
+                log.info("Error occurred, but browser will remain open for manual filling...")
+                threading.Thread(target=self.wait_for_close, args=(session,), daemon=True).start()
+                raise
                     
         except Exception as e:
-            print(f"\n Fatal Error: {e}")
-            traceback.print_exc()
+            log.error("Fatal error: %s: %s", type(e).__name__, e)
+            log.debug("Traceback:", exc_info=True)
             raise
     
-    def _get_question_text(self, question_element) -> str:
-        """Extract question text using multiple strategies"""
+    def window_closed(self, session: tuple):
+        """
+        Future that resolves once the user closes the form window
         
-        # Strategy 1: role="heading"
+        Nothing blocks on the caller's side while waiting, so async callers can
+        await it via asyncio.wrap_future(); call release() afterwards.
+        """
+        slot, page = session
+        return slot.submit(slot.wait_until_closed, page)
+    
+    def release(self, session: tuple):
+        """Return a closed session's browser to the pool"""
+        slot, page = session
+        self._release_slot(slot, page)
+    
+    def wait_for_close(self, session: tuple):
+        """Block until the user closes the form window, then return its browser to the pool"""
+        slot, page = session
         try:
-            heading = question_element.query_selector('[role="heading"]')
-            if heading:
-                text = heading.inner_text().strip()
-                if text:
-                    return text.replace('*', '').strip()
-        except:
-            pass
-        
-        # Strategy 2: Common Google Forms classes
-        selectors = [
-            '.freebirdFormviewerComponentsQuestionBaseTitle',
-            '.freebirdFormviewerViewItemsItemItemTitle',
-            '[data-item-id] > div > div > div',
-            'div[dir="auto"]'
-        ]
-        
-        for selector in selectors:
-            try:
-                elem = question_element.query_selector(selector)
-                if elem:
-                    text = elem.inner_text().strip()
-                    if text and len(text) > 1:
-                        return text.replace('*', '').strip()
-            except:
-                continue
+            # Event-driven: the slot thread sleeps inside Playwright until the page closes
+            slot.call(slot.wait_until_closed, page)
+            log.info("Form window closed. Cleaning up...")
+        finally:
+            self._release_slot(slot, page)
+    
+    def prewarm(self, url: str):
+        """
+        Start loading url in a pooled browser without waiting for it
         
-        return ""
+        Lets the page load overlap with PDF extraction; a later
+        fill_form_and_return() for the same URL picks up the loaded page.
+        """
+        url = self._normalize_url(url)
+        with GoogleFormFiller._warm_lock:
+            if url in GoogleFormFiller._warm_pages:
+                return
+            slot = self._acquire_slot()
+            future = slot.submit(self._open_form, slot, url)
+            # Nobody may ever fill it (failed extraction, different URL, abandoned client)
+            timer = threading.Timer(PREWARM_TTL, self.discard_warm_page, args=(url, future))
+            timer.daemon = True
+            GoogleFormFiller._warm_pages[url] = (slot, future, timer)
+            timer.start()
+        log.info("Preloading form: %s", url)
     
-    def _fill_field_advanced(self, page, question_element, value: str, question_text: str) -> bool:
-        """Advanced field filling with multiple strategies"""
+    def discard_warm_page(self, url: str, future=None):
+        """
+        Drop the preloaded page for url and return its browser to the pool
         
-        print(f"    → Strategy 1: Looking for input fields...")
+        With future given, only that preload is dropped (so an expiry timer
+        can't discard a newer preload of the same URL).
+        """
+        url = self._normalize_url(url)
+        with GoogleFormFiller._warm_lock:
+            warm = GoogleFormFiller._warm_pages.get(url)
+            if warm is None or (future is not None and warm[1] is not future):
+                return
+            del GoogleFormFiller._warm_pages[url]
         
-        # Strategy 1: Direct input fields
-        input_selectors = [
-            'input[type="text"]',
-            'input[type="email"]',
-            'input[type="tel"]',
-            'input[type="number"]',
-            'input[aria-label]',
-            'textarea'
-        ]
+        slot, future, timer = warm
+        timer.cancel()
+        log.info("Discarding preloaded form: %s", url)
+        try:
+            page = future.result()
+        except Exception:
+            page = None
+        self._release_slot(slot, page)
+    
+    def _claim_warm_page(self, url: str) -> tuple:
+        """Take the preloaded (slot, page) for url; page is None if there is none, it failed or was closed"""
+        with GoogleFormFiller._warm_lock:
+            warm = GoogleFormFiller._warm_pages.pop(url, None)
+        if warm is None:
+            return None, None
         
-        for selector in input_selectors:
-            inputs = question_element.query_selector_all(selector)
-            for inp in inputs:
-                try:
-                    if not inp.is_visible():
-                        continue
-                    
-                    print(f"      → Found {selector}, attempting to fill...")
-                    
-                    # Scroll into view
-                    inp.scroll_into_view_if_needed()
-                    page.wait_for_timeout(500)
-                    
-                    # Click to focus
-                    inp.click(timeout=3000)
-                    page.wait_for_timeout(300)
-                    
-                    # Clear existing content
-                    inp.fill('', timeout=3000)
-                    page.wait_for_timeout(200)
-                    
-                    # Type the value
-                    inp.type(str(value), delay=50)
-                    page.wait_for_timeout(500)
-                    
-                    # Verify it worked
-                    try:
-                        filled_value = inp.input_value()
-                        if filled_value == str(value):
-                            print(f"      Verified: input contains '{filled_value}'")
-                            return True
-                    except:
-                        pass
-                    
-                    return True
-                    
-                except Exception as e:
-                    print(f"      Failed: {e}")
-                    continue
+        slot, future, timer = warm
+        timer.cancel()
+        try:
+            page = future.result()
+            # The preload window is visible, so the user may have closed it meanwhile
+            if slot.call(page.is_closed):
+                log.info("Preloaded form window was closed, loading it again")
+                return slot, None
+            log.debug("Using preloaded page")
+            return slot, page
+        except Exception as e:
+            log.warning("Preloading form failed, loading it again: %s", e)
+            return slot, None
+    
+    @staticmethod
+    def _normalize_url(url: str) -> str:
+        # Convert /preview to /viewform
+        if '/preview' in url:
+            url = url.replace('/preview', '/viewform')
+            log.info("Converted to viewform URL: %s", url)
+        return url
+    
+    def _open_form(self, slot: _BrowserSlot, url: str):
+        """Open a page in slot and load the form (runs on the slot's thread)"""
+        page = slot.open_page()
+        try:
+            self._load_form(page, url)
+        except Exception:
+            page.close()
+            raise
+        return page
+    
+    def _load_form(self, page, url: str):
+        log.debug("Loading page...")
+        page.goto(url, wait_until='domcontentloaded', timeout=60000)
         
-        print(f"    → Strategy 2: Looking for contenteditable divs...")
+        # Wait for the questions to render rather than a fixed delay
+        page.wait_for_selector('[role="listitem"]', timeout=10000)
+        log.debug("Page loaded")
+    
+    def _fill_page(
+        self, page, url: str, data_dict: Dict[str, str], preloaded: bool = False
+    ) -> Tuple[int, int, str]:
+        """Load the form in page (unless preloaded) and fill it (runs on the Playwright thread)"""
+        if not preloaded:
+            self._load_form(page, url)
         
-        # Strategy 2: Content editable divs
-        try:
-            divs = question_element.query_selector_all('[contenteditable="true"]')
-            for div in divs:
-                try:
-                    if not div.is_visible():
-                        continue
-                    
-                    print(f"      → Found contenteditable div...")
-                    div.click(timeout=3000)
-                    page.wait_for_timeout(200)
-                    
-                    div.fill('', timeout=3000)
-                    page.wait_for_timeout(200)
-                    div.type(str(value), delay=50)
-                    page.wait_for_timeout(300)
-                    
-                    return True
-                except Exception as e:
-                    print(f"      Failed: {e}")
+        filled = 0
+        total = 0
+        
+        # Get all form questions
+        log.debug("Analyzing form structure...")
+        specs = page.evaluate(_EXTRACT_QUESTIONS_JS)
+        log.debug("Found %d form elements", len(specs))
+        
+        # Match questions to data first, then fill them all in one script
+        targets = []
+        for spec in specs:
+            q_text = spec['text']
+            if not q_text:
+                continue
+            
+            idx = spec['idx'] + 1
+            q_text_lower = q_text.lower()
+            total += 1
+            
+            log.debug("[%d] Question: %s", idx, q_text)
+            
+            # Get value for this field
+            value = self.get_value_for_field(q_text_lower, data_dict)
+            
+            if not value:
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("    No matching data (available: %s)", list(data_dict.keys()))
+                continue
+            
+            log.debug("    → Will fill with: %s", value)
+            targets.append((idx, spec, str(value), q_text_lower))
+        
+        log.debug("Filling all matched fields in one pass...")
+        batch_results = page.evaluate(
+            _BATCH_FILL_JS,
+            [{'index': idx - 1, 'value': value} for idx, _, value, _ in targets]
+        )
+        
+        questions = page.locator('[role="listitem"]')
+        for (idx, spec, value, q_text_lower), batch_ok in zip(targets, batch_results):
+            try:
+                if batch_ok:
+                    filled += 1
+                    log.debug("[%d] Successfully filled!", idx)
+                    continue
+                
+                if not (spec['hasInput'] or spec['hasTextarea'] or spec['hasContentEditable']):
+                    log.debug("[%d] No text input in this question, skipping", idx)
                     continue
-        except:
-            pass
+                
+                # Anything the script couldn't fill goes through the per-field strategies
+                log.debug("[%d] Batch fill missed, trying per-field strategies...", idx)
+                success = self._fill_field_advanced(
+                    page, questions.nth(idx - 1), value, q_text_lower, url
+                )
+                
+                if success:
+                    filled += 1
+                    log.debug("    Successfully filled!")
+                else:
+                    log.debug("    Could not fill field")
+            
+            except Exception as e:
+                log.warning("Q%d failed: %s: %s", idx, type(e).__name__, e)
+                log.debug("Traceback:", exc_info=True)
+                continue
         
-        print(f"     Strategy 3: Using JavaScript injection...")
+        log.info("Filled %d/%d fields", filled, total)
         
-        # Strategy 3: JavaScript injection as last resort
+        # Capture screenshot
+        log.debug("Capturing screenshot...")
         try:
-            inputs = question_element.query_selector_all('input, textarea')
-            for inp in inputs:
-                try:
-                    if not inp.is_visible():
-                        continue
-                    
-                    print(f"      Trying JavaScript fill...")
-                    
-                    page.evaluate(f'''(element) => {{
-                        element.value = "{value}";
-                        element.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                        element.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                    }}''', inp)
-                    
-                    page.wait_for_timeout(300)
+            page.wait_for_load_state('networkidle', timeout=5000)
+        except PlaywrightError:
+            pass  # Screenshot whatever has rendered
+        # Shoot just the form's question list instead of relaying out the whole page;
+        # JPEG is far smaller and faster to encode than PNG
+        screenshot_name = 'filled_form.jpg'
+        screenshot_path = self.output_dir / screenshot_name
+        question_list = page.locator('form [role="list"]')
+        if question_list.count() == 0:
+            question_list = page.locator('[role="list"]')
+        try:
+            question_list.first.screenshot(
+                path=str(screenshot_path), type='jpeg', quality=80, timeout=5000
+            )
+        except PlaywrightError:
+            page.screenshot(path=str(screenshot_path), type='jpeg', quality=80)
+        log.info("✓ Screenshot saved: %s", screenshot_name)
+        
+        self._save_skills()
+        return filled, total, screenshot_name
+    
+    def _acquire_slot(self) -> _BrowserSlot:
+        """Take an idle browser, or start a new one if all are in use"""
+        try:
+            return GoogleFormFiller._idle_slots.get_nowait()
+        except queue.Empty:
+            return _BrowserSlot()
+    
+    def _track_active(self, slot: _BrowserSlot):
+        """Record a slot serving a form window so close() can reach it"""
+        with GoogleFormFiller._active_lock:
+            GoogleFormFiller._active_slots.add(slot)
+    
+    def _release_slot(self, slot: _BrowserSlot, page=None):
+        """Reset the slot and keep it warm for the next fill, unless the pool is full"""
+        with GoogleFormFiller._active_lock:
+            GoogleFormFiller._active_slots.discard(slot)
+        if slot.stopped:
+            return  # Already torn down by close()
+        try:
+            slot.call(slot.reset, page)
+            if GoogleFormFiller._idle_slots.qsize() < BROWSER_POOL_SIZE:
+                GoogleFormFiller._idle_slots.put(slot)
+                return
+        except Exception as e:
+            log.warning("Could not recycle browser: %s", e)
+        slot.shutdown()
+    
+    def close(self):
+        """Shut down all pooled browsers, including open form windows (call on app shutdown)"""
+        with GoogleFormFiller._warm_lock:
+            warm = list(GoogleFormFiller._warm_pages.values())
+            GoogleFormFiller._warm_pages.clear()
+        for slot, _, timer in warm:
+            timer.cancel()
+            slot.shutdown()
+        
+        with GoogleFormFiller._active_lock:
+            active = list(GoogleFormFiller._active_slots)
+            GoogleFormFiller._active_slots.clear()
+        for slot in active:
+            slot.shutdown()
+        
+        while True:
+            try:
+                slot = GoogleFormFiller._idle_slots.get_nowait()
+            except queue.Empty:
+                break
+            slot.shutdown()
+    
+    def _fill_field_advanced(
+        self, page, question_element, value: str, question_text: str, url: str = ''
+    ) -> bool:
+        """Advanced field filling with multiple strategies, trying the remembered one first"""
+        
+        skill = self._load_skills().get(url, {}).get(question_text)
+        if skill:
+            log.debug("    → Replaying strategy %d from skills cache...", skill['strategy'])
+            try:
+                target = question_element.locator(skill['selector']).nth(skill['index'])
+                if self._apply_strategy(skill['strategy'], target, value):
                     return True
-                    
+            except Exception as e:
+                log.debug("      Cached selector failed: %s", e)
+        
+        for strategy, description, selector in _FILL_STRATEGIES:
+            log.debug("    → Strategy %d: %s...", strategy, description)
+            
+            try:
+                targets = question_element.locator(selector).all()
+            except Exception as e:
+                log.debug("      Failed: %s", e)
+                continue
+            
+            for index, target in enumerate(targets):
+                try:
+                    if self._apply_strategy(strategy, target, value):
+                        self._learn_skill(url, question_text, strategy, selector, index)
+                        return True
                 except Exception as e:
-                    print(f"       Failed: {e}")
+                    log.debug("      Failed: %s", e)
                     continue
-        except:
-            pass
         
-        print(f"    → All strategies failed")
+        log.debug("    → All strategies failed")
         return False
     
+    def _apply_strategy(self, strategy: int, target, value: str) -> bool:
+        """Fill one control using the given strategy"""
+        if strategy == 1:
+            log.debug("      → Found input, attempting to fill...")
+            
+            # fill() focuses, clears and sets the value in one action,
+            # waiting for the input to become editable
+            target.fill(str(value), timeout=3000)
+            
+            # Verify it worked
+            try:
+                filled_value = target.input_value()
+                if filled_value == str(value):
+                    log.debug("      Verified: input contains %r", filled_value)
+            except:
+                pass
+            
+            return True
+        
+        if strategy == 2:
+            log.debug("      → Found contenteditable div...")
+            target.evaluate(_SET_TEXT_CONTENT_JS, str(value))
+            return True
+        
+        log.debug("      Trying JavaScript fill...")
+        target.evaluate(_SET_VALUE_JS, str(value))
+        return True
+    
+    def _load_skills(self) -> Dict[str, Dict[str, dict]]:
+        """Read the skills cache once per process"""
+        with GoogleFormFiller._skills_lock:
+            if GoogleFormFiller._skills is None:
+                skills = {}
+                if _SKILLS_PATH.exists():
+                    try:
+                        saved = json.loads(_SKILLS_PATH.read_text(encoding='utf-8'))
+                        if saved.get('version') == _SKILLS_VERSION:
+                            skills = saved['forms']
+                    except Exception as e:
+                        log.warning("Ignoring unreadable skills cache: %s", e)
+                GoogleFormFiller._skills = skills
+            return GoogleFormFiller._skills
+    
+    def _learn_skill(self, url: str, question_text: str, strategy: int, selector: str, index: int):
+        """Remember which control filled this question"""
+        if not url:
+            return
+        self._load_skills()
+        with GoogleFormFiller._skills_lock:
+            GoogleFormFiller._skills.setdefault(url, {})[question_text] = {
+                'strategy': strategy, 'selector': selector, 'index': index
+            }
+            GoogleFormFiller._skills_dirty = True
+    
+    def _save_skills(self):
+        """Write the skills cache if anything new was learned"""
+        with GoogleFormFiller._skills_lock:
+            if not GoogleFormFiller._skills_dirty:
+                return
+            try:
+                _SKILLS_PATH.parent.mkdir(parents=True, exist_ok=True)
+                _SKILLS_PATH.write_text(
+                    json.dumps({'version': _SKILLS_VERSION, 'forms': GoogleFormFiller._skills}),
+                    encoding='utf-8'
+                )
+                GoogleFormFiller._skills_dirty = False
+            except Exception as e:
+                log.warning("Could not write skills cache: %s", e)
+    
     def get_value_for_field(self, field_name: str, data: Dict[str, str]) -> str:
         """Smart field matching"""
-        field = field_name.lower()
-        
-        print(f"    → Matching '{field}' against available data...")
-        
-        # Name field
-        if any(k in field for k in ['name', 'naam', 'full name', 'your name', 'applicant']):
-            if 'name' in data:
-                return data['name']
-        
-        # Email field
-        if any(k in field for k in ['email', 'e-mail', 'mail', 'electronic']):
-            if 'email' in data:
-                return data['email']
-        
-        # Phone field
-        if any(k in field for k in ['phone', 'mobile', 'contact', 'telephone', 'cell']):
-            if 'phone' in data:
-                return data['phone']
-        
-        # Aadhaar field
-        if any(k in field for k in ['aadhaar', 'aadhar', 'uid', 'unique', 'adhaar','Aadhar number','Aadhar']):
-            if 'aadhaar' in data:
-                return data['aadhaar']
-        
-        # PAN field
-        if any(k in field for k in ['pan', 'permanent account']):
-            if 'pan' in data:
-                return data['pan']
-        
-        # Address field
-        if any(k in field for k in ['address', 'location', 'residence', 'street']):
-            if 'address' in data:
-                return data['address']
-        
-        # Pincode field
-        if any(k in field for k in ['pin', 'postal', 'zip', 'pincode']):
-            if 'pincode' in data:
-                return data['pincode']
-        
-        # Date field
-        if any(k in field for k in ['dob', 'birth', 'date']):
-            if 'date' in data:
-                return data['date']
+        match = _FIELD_RE.match(field_name.lower())
+        
+        # Highest-priority field mentioned in the question that we have data for
+        for key, _ in _FIELD_KEYWORDS:
+            if match.group(key) is not None and key in data:
+                return data[key]
         
         return ''
+
@@ -4,7 +4,7 @@ AI Form Filler - FastAPI Backend
 Main application file - Windows compatible version
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
@@ -12,16 +12,23 @@ from typing import Dict, Optional
 import os
 import shutil
 from pathlib import Path
-import traceback
 import sys
 import asyncio
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+log = logging.getLogger(__name__)
 
 # ============================================================
 # CRITICAL FIX FOR WINDOWS
 # ============================================================
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-    print("✓ Windows event loop policy set")
+    log.info("✓ Windows event loop policy set")
 # ============================================================
 
 # Import our modules
@@ -50,11 +57,19 @@ OUTPUT_DIR = Path("outputs")
 UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
 
-print("\n" + "="*60)
-print("📁 Directories created:")
-print(f"   Upload: {UPLOAD_DIR.absolute()}")
-print(f"   Output: {OUTPUT_DIR.absolute()}")
-print("="*60)
+# Uploads are copied to disk this many bytes at a time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# PDFs extracted in parallel, each in its own worker process (OCR and BERT are CPU-bound)
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+
+log.info("📁 Directories: upload=%s output=%s", UPLOAD_DIR.absolute(), OUTPUT_DIR.absolute())
+
+# Fill jobs whose form window may still be open, keyed by job id
+jobs: Dict[str, dict] = {}
+
+# Seconds a finished job's status stays queryable before it is dropped
+JOB_RETENTION_SECONDS = 600
 
 
 # Pydantic models
@@ -77,6 +92,89 @@ class FormFillResponse(BaseModel):
     success_rate: str
     screenshot: Optional[str]
     message: str
+    job_id: Optional[str] = None
+
+
+def _run_extract(pdf_path: str):
+    """Run the full extraction pipeline (in an extraction worker)"""
+    return SmartPDFExtractor(pdf_path).process()
+
+
+@app.on_event("startup")
+async def _start_extract_pool():
+    app.state.extract_pool = _new_extract_pool()
+
+
+def _new_extract_pool():
+    try:
+        # Spawn, not fork: by the time workers start, the process runs browser and executor threads
+        return ProcessPoolExecutor(
+            max_workers=EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    except Exception as e:
+        # e.g. no working multiprocessing on this platform; threads still free the event loop
+        log.warning("Process pool unavailable, extracting in threads: %s", e)
+        return ThreadPoolExecutor(max_workers=EXTRACT_WORKERS)
+
+
+async def _extract_in_pool(pdf_path: str):
+    """Run _run_extract in the pool, replacing the pool once if a worker died"""
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = app.state.extract_pool
+        try:
+            return await loop.run_in_executor(pool, _run_extract, pdf_path)
+        except BrokenProcessPool:
+            # A dead worker (OOM, native crash) breaks the whole pool for good
+            log.warning("Extraction worker died, restarting the pool")
+            if app.state.extract_pool is pool:  # Not already replaced by another request
+                app.state.extract_pool = _new_extract_pool()
+                pool.shutdown(wait=False)
+            if attempt:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Extraction worker crashed, please try again"
+                )
+
+
+@app.on_event("shutdown")
+async def _stop_extract_pool():
+    app.state.extract_pool.shutdown(cancel_futures=True)
+
+
+@app.on_event("startup")
+async def _start_filler():
+    # One filler for the app's lifetime; its constructor checks the Chromium
+    # install, and sync Playwright must stay off the event loop
+    app.state.filler = await asyncio.to_thread(GoogleFormFiller)
+
+
+@app.on_event("shutdown")
+async def _stop_filler():
+    await asyncio.to_thread(app.state.filler.close)
+
+
+def _save_upload(src, dest: Path) -> int:
+    """Stream an upload to disk in chunks, returning the number of bytes written"""
+    with open(dest, "wb") as buffer:
+        shutil.copyfileobj(src, buffer, UPLOAD_CHUNK_SIZE)
+        return buffer.tell()
+
+
+def _with_scheme(url: str) -> str:
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+
+async def _prewarm_form(form_url: str):
+    """Start loading the form in the background so /fill-form finds it ready"""
+    try:
+        app.state.filler.prewarm(_with_scheme(form_url))
+    except Exception as e:
+        # Only an optimisation; /fill-form loads the page itself if this failed
+        log.warning("Could not preload form: %s", e)
 
 
 @app.get("/")
@@ -90,6 +188,7 @@ async def root():
         "endpoints": [
             "/extract",
             "/fill-form",
+            "/fill-form/{job_id}/status",
             "/download/{filename}",
             "/docs"
         ]
@@ -97,41 +196,37 @@ async def root():
 
 
 @app.post("/extract", response_model=ExtractionResponse)
-async def extract_pdf_data(file: UploadFile = File(...)):
-    """Extract structured data from uploaded PDF"""
+async def extract_pdf_data(file: UploadFile = File(...), form_url: Optional[str] = Form(None)):
+    """Extract structured data from uploaded PDF, preloading form_url if given"""
     
-    print(f"\n{'='*60}")
-    print(f"📥 RECEIVED FILE UPLOAD")
-    print(f"{'='*60}")
-    print(f"Filename: {file.filename}")
-    print(f"Content-Type: {file.content_type}")
-    print(f"{'='*60}\n")
+    log.info("📥 Received file upload: %s (%s)", file.filename, file.content_type)
     
     if not file.filename.lower().endswith('.pdf'):
-        print("❌ Invalid file type")
+        log.warning("❌ Invalid file type")
         raise HTTPException(
             status_code=400, 
             detail="Only PDF files are supported."
         )
     
-    file_path = UPLOAD_DIR / file.filename
+    # Unique name per upload: concurrent uploads of e.g. aadhaar.pdf must not share a
+    # file, and the client's filename never becomes part of a path
+    file_path = UPLOAD_DIR / f"{uuid.uuid4().hex}.pdf"
+    
+    if form_url:
+        await _prewarm_form(form_url)
     
     try:
-        print(f"💾 Saving file to: {file_path}")
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        log.debug("💾 Saving file to: %s", file_path)
+        file_size = await asyncio.to_thread(_save_upload, file.file, file_path)
+        log.debug("✓ File saved (%d bytes)", file_size)
         
-        file_size = os.path.getsize(file_path)
-        print(f"✓ File saved ({file_size} bytes)\n")
+        log.debug("🔍 Starting extraction...")
+        # Off the event loop so other requests keep being served meanwhile
+        text, extracted_data = await _extract_in_pool(str(file_path))
         
-        print("🔍 Starting extraction...")
-        extractor = SmartPDFExtractor(str(file_path))
-        text, extracted_data = extractor.process()
-        
-        print(f"🗑️ Cleaning up...")
+        log.debug("🗑️ Cleaning up...")
         os.remove(file_path)
-        print(f"✓ Cleanup complete\n")
+        log.debug("✓ Cleanup complete")
         
         response = ExtractionResponse(
             success=True,
@@ -140,16 +235,22 @@ async def extract_pdf_data(file: UploadFile = File(...)):
             message=f"Successfully extracted {len(extracted_data)} fields"
         )
         
-        print(f"✅ SUCCESS - Returning {len(extracted_data)} fields\n")
+        log.info("✅ SUCCESS - Returning %d fields", len(extracted_data))
         return response
         
     except Exception as e:
         if file_path.exists():
             os.remove(file_path)
         
-        print(f"\n❌ ERROR: {type(e).__name__}: {str(e)}")
-        traceback.print_exc()
+        log.error("❌ ERROR: %s: %s", type(e).__name__, e)
+        log.debug("Traceback:", exc_info=True)
+        
+        if form_url:
+            # No fill will follow a failed extraction; free the preloaded browser
+            await asyncio.to_thread(app.state.filler.discard_warm_page, _with_scheme(form_url))
         
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(
             status_code=500,
             detail=f"Extraction failed: {str(e)}"
@@ -157,44 +258,47 @@ async def extract_pdf_data(file: UploadFile = File(...)):
 
 
 @app.post("/fill-form", response_model=FormFillResponse)
-def fill_google_form_sync(request: FormFillRequest):
-    """Fill Google Form - Synchronous endpoint for Windows compatibility"""
+async def fill_google_form(request: FormFillRequest):
+    """Fill Google Form and return immediately; the form window stays open for the user"""
     
-    print(f"\n{'='*60}")
-    print(f"📝 FILLING FORM")
-    print(f"{'='*60}")
-    print(f"URL: {request.form_url}")
-    print(f"Data fields: {list(request.data.keys())}")
-    print(f"{'='*60}\n")
+    log.info("📝 Filling form: %s", request.form_url)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Data fields: %s", list(request.data.keys()))
     
     try:
-        if not request.form_url.startswith(('http://', 'https://')):
-            request.form_url = 'https://' + request.form_url
+        request.form_url = _with_scheme(request.form_url)
         
-        # Use sync form filler
-        filler = GoogleFormFiller()
-        filled, total, screenshot = filler.fill_form(
+        # Sync Playwright must stay off the event loop (also keeps Windows compatible)
+        filler = app.state.filler
+        filled, total, screenshot, session = await asyncio.to_thread(
+            filler.fill_form_and_return,
             request.form_url,
             request.data
         )
         
         success_rate = f"{(filled/total*100):.1f}%" if total > 0 else "0%"
         
+        # Waiting for the user to close the form window happens in the background
+        job_id = uuid.uuid4().hex
+        jobs[job_id] = {"status": "open", "form_url": request.form_url}
+        jobs[job_id]["task"] = asyncio.create_task(_watch_form_window(job_id, filler, session))
+        
         response = FormFillResponse(
             success=True,
             fields_filled=filled,
             total_fields=total,
             success_rate=success_rate,
             screenshot=screenshot,
+            job_id=job_id,
             message=f"Successfully filled {filled}/{total} fields ({success_rate})"
         )
         
-        print(f"✅ SUCCESS - Filled {filled}/{total} fields\n")
+        log.info("✅ SUCCESS - Filled %d/%d fields (job %s)", filled, total, job_id)
         return response
         
     except Exception as e:
-        print(f"\n❌ ERROR: {type(e).__name__}: {str(e)}")
-        traceback.print_exc()
+        log.error("❌ ERROR: %s: %s", type(e).__name__, e)
+        log.debug("Traceback:", exc_info=True)
         
         raise HTTPException(
             status_code=500,
@@ -202,6 +306,35 @@ def fill_google_form_sync(request: FormFillRequest):
         )
 
 
+async def _watch_form_window(job_id: str, filler: GoogleFormFiller, session: tuple):
+    """Mark the job closed once the user closes its form window"""
+    try:
+        # Awaits the browser's own thread; no executor thread is held while the window is open
+        await asyncio.wrap_future(filler.window_closed(session))
+        log.info("Form window closed (job %s)", job_id)
+        jobs[job_id]["status"] = "closed"
+    except Exception as e:
+        log.error("❌ Job %s watcher failed: %s", job_id, e)
+        jobs[job_id]["status"] = "error"
+    finally:
+        jobs[job_id].pop("task", None)
+        asyncio.get_running_loop().call_later(JOB_RETENTION_SECONDS, jobs.pop, job_id, None)
+        try:
+            await asyncio.to_thread(filler.release, session)
+        except Exception as e:
+            log.warning("Could not release browser for job %s: %s", job_id, e)
+
+
+@app.get("/fill-form/{job_id}/status")
+async def fill_form_status(job_id: str):
+    """Whether the form window of a fill job is still open"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    return {"job_id": job_id, "status": job["status"], "form_url": job["form_url"]}
+
+
 @app.get("/download/{filename}")
 async def download_file(filename: str):
     """Download generated files"""
@@ -225,7 +358,8 @@ async def cleanup_files():
             if file.is_file():
                 os.remove(file)
         
-        for file in OUTPUT_DIR.glob("*"):
+        # Includes cached extraction results under outputs/.extract_cache
+        for file in OUTPUT_DIR.rglob("*"):
             if file.is_file():
                 os.remove(file)
         
@@ -236,7 +370,16 @@ async def cleanup_files():
 
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
+    
+    # Reloading restarts the worker (and its pooled browsers) on every file change,
+    # so it's for development only: `python main.py --reload` or DEV=1
+    parser = argparse.ArgumentParser(description="AI Form Filler API server")
+    parser.add_argument("--reload", action="store_true", help="restart on code changes (development)")
+    args = parser.parse_args()
+    reload = args.reload or bool(os.getenv("DEV"))
+    
     print("\n" + "="*60)
     print("🚀 Starting AI Form Filler API Server")
     print("="*60)
@@ -245,13 +388,16 @@ if __name__ == "__main__":
     print("   - API: http://localhost:8000")
     print("   - Docs: http://localhost:8000/docs")
     print("\n💡 Using sync Playwright for Windows compatibility")
+    if reload:
+        print("\n🔄 Auto-reload enabled (development mode)")
     print("\n⚠️  Press CTRL+C to stop\n")
     print("="*60 + "\n")
     
+    # Uvicorn can only reload an app given as an import string
     uvicorn.run(
-        app, 
+        "main:app" if reload else app, 
         host="0.0.0.0", 
         port=8000, 
-        reload=True,
+        reload=reload,
         log_level="info"
     )
\ No newline at end of file
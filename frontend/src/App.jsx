@@ -61,6 +61,10 @@ const FormFillerApp = () => {
 
     const formData = new FormData();
     formData.append('file', file);
+    if (formUrl) {
+      // Lets the backend start loading the form while the PDF is extracted
+      formData.append('form_url', formUrl);
+    }
 
     try {
       console.log('Sending upload request to:', `${API_URL}/extract`);
@@ -314,6 +318,23 @@ const FormFillerApp = () => {
               <h2 className="text-2xl font-bold text-gray-800 mb-2">Upload Document</h2>
               <p className="text-gray-600 mb-6">Upload a PDF containing personal information</p>
               
+              <div className="mb-6 text-left">
+                <label className="block text-sm font-medium text-gray-700 mb-2">
+                  Form URL <span className="text-gray-500 font-normal">(optional - the form starts loading while your PDF is processed)</span>
+                </label>
+                <div className="relative">
+                  <Link2 className="absolute left-3 top-3 w-5 h-5 text-gray-400" />
+                  <input
+                    type="url"
+                    value={formUrl}
+                    onChange={(e) => setFormUrl(e.target.value)}
+                    placeholder="https://docs.google.com/forms/..."
+                    disabled={loading}
+                    className="w-full pl-10 pr-4 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-indigo-500 focus:border-indigo-500 outline-none"
+                  />
+                </div>
+              </div>
+              
               <label className="cursor-pointer">
                 <div className="border-2 border-dashed border-indigo-300 rounded-lg p-12 hover:border-indigo-500 transition-colors">
                   <FileText className="w-12 h-12 text-indigo-400 mx-auto mb-3" />